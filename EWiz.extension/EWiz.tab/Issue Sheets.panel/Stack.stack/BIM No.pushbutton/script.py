@@ -26,8 +26,10 @@ import shutil
 import clr
 import re
 import datetime
-from collections import OrderedDict
+import System
+from System import Action
 from System.Runtime.InteropServices import Marshal
+from System.Threading.Tasks import Parallel
 
 # Add necessary .NET and Revit references
 clr.AddReference('RevitAPI')
@@ -38,11 +40,75 @@ clr.AddReference('System.Windows.Forms')
 import Microsoft.Office.Interop.Excel as Excel
 from System.Windows.Forms import SaveFileDialog, DialogResult
 from Autodesk.Revit.DB import (
-    FilteredElementCollector, BuiltInCategory,
-    ViewSheet, RevisionNumberType
+    FilteredElementCollector, BuiltInCategory, BuiltInParameter,
+    ViewSheet, Revision, RevisionCloud,
+    RevisionNumberType, RevisionNumberingSequence
 )
 from Autodesk.Revit.UI import TaskDialog
 
+# -- Drawing number parameters ----------------------------------------------
+
+# joined with '-' in this order; names containing 'Project' live on ProjectInformation
+DRAWING_NUMBER_PARAMS = (
+    'EWP_Project_BIM Number',
+    'EWP_Project_Originator Code',
+    'EWP_Sheet_Zone Code',
+    'EWP_Sheet_Level Code',
+    'EWP_Sheet_Type Code',
+    'EWP_Project_Role Code',
+    'Sheet Number'
+)
+
+# built-in parameters are fetched by id rather than by display-name scan
+BUILTIN_PARAMS = {
+    'Project Number': BuiltInParameter.PROJECT_NUMBER,
+    'Sheet Number': BuiltInParameter.SHEET_NUMBER,
+}
+
+def get_param_string(element, pname):
+    bip = BUILTIN_PARAMS.get(pname)
+    if bip is not None:
+        p = element.get_Parameter(bip)
+    else:
+        p = element.LookupParameter(pname)
+    if p and p.AsString():
+        return p.AsString().strip()
+    return None
+
+def read_project_parts(proj_info):
+    """Read the project-scoped drawing number parts once per run."""
+    return {pname: get_param_string(proj_info, pname)
+            for pname in DRAWING_NUMBER_PARAMS if 'Project' in pname}
+
+# -- Date parsing -----------------------------------------------------------
+
+_DATE_SPLIT_RX = re.compile(r'\d+')
+_DATE_FMT_RX = re.compile(r'^\d{1,2}[./]\d{1,2}[./]\d{2,4}$')
+_DATE_PARTS_CACHE = {}
+
+def parse_date_parts(date_str):
+    """
+    Split a dd/MM/yy style date (. or / separated) into (d, m, y) ints.
+    Returns None if the string is not in that shape. Results are memoized
+    since the same revision dates recur on every worksheet.
+    """
+    try:
+        return _DATE_PARTS_CACHE[date_str]
+    except KeyError:
+        pass
+    parts = date_str.replace('.', '/').split('/')
+    if not (len(parts) == 3 and all(p.isdigit() for p in parts)
+            and len(parts[0]) <= 2 and len(parts[1]) <= 2
+            and 2 <= len(parts[2]) <= 4):
+        # slow path for anything the plain split does not recognise
+        if _DATE_FMT_RX.match(date_str):
+            parts = _DATE_SPLIT_RX.findall(date_str)
+        else:
+            parts = None
+    result = tuple(map(int, parts)) if parts else None
+    _DATE_PARTS_CACHE[date_str] = result
+    return result
+
 # -- Helper functions ------------------------------------------------------
 
 def current_date():
@@ -67,6 +133,9 @@ def excel_col_name(n):
         n -= 1
     return name
 
+# zero-based column index → name for A..ZZ
+COL_NAMES = tuple(excel_col_name(i) for i in range(702))
+
 def save_file_dialog(init_dir):
     dlg = SaveFileDialog()
     dlg.InitialDirectory = init_dir
@@ -87,8 +156,11 @@ def filter_valid_sheets_and_show_count(all_sheets, all_revisions):
         p = sheet.LookupParameter("Appears In Sheet List")
         if not p or p.AsInteger() != 1:
             continue
-        rs = RevisedSheet(sheet)
-        if sheet.GetAllViewports() and rs.rev_count > 0:
+        vps = sheet.GetAllViewports()
+        if not vps:
+            continue
+        rs = RevisedSheet(sheet, vps)
+        if rs.rev_count > 0:
             revised_sheets.append(rs)
     total_revisions = len(all_revisions)
     #TaskDialog.Show(
@@ -97,6 +169,29 @@ def filter_valid_sheets_and_show_count(all_sheets, all_revisions):
     #)
     return revised_sheets, total_revisions
 
+# -- Excel state ------------------------------------------------------------
+
+def suspend_excel_updates(excel, wb):
+    """
+    Turn off recalculation, screen updating, events and page-break display
+    while the workbook is filled. Returns the previous state for restore.
+    """
+    state = (excel.Calculation, excel.ScreenUpdating, excel.EnableEvents)
+    excel.Calculation = Excel.XlCalculation.xlCalculationManual
+    excel.ScreenUpdating = False
+    excel.EnableEvents = False
+    for i in range(1, wb.Worksheets.Count + 1):
+        ws = wb.Worksheets.Item[i]
+        ws.EnableCalculation = False
+        ws.DisplayPageBreaks = False
+    return state
+
+def restore_excel_updates(excel, wb, state):
+    """Re-enable what suspend_excel_updates turned off (recalculates once)."""
+    for i in range(1, wb.Worksheets.Count + 1):
+        wb.Worksheets.Item[i].EnableCalculation = True
+    excel.Calculation, excel.ScreenUpdating, excel.EnableEvents = state
+
 # -- Revision filtering ----------------------------------------------------
 
 def build_filtered_rev_data(all_revisions, revised_sheets):
@@ -105,11 +200,8 @@ def build_filtered_rev_data(all_revisions, revised_sheets):
     actually assigned to one of the revised_sheets, sorted by num.
     """
     # collect all used revision IDs
-    assigned = set()
-    for rs in revised_sheets:
-        assigned |= rs._rev_ids
+    assigned = frozenset().union(*(rs._rev_ids for rs in revised_sheets))
 
-    date_rx = re.compile(r'^\d{1,2}[./]\d{1,2}[./]\d{2,4}$')
     filtered = []
     for rev in all_revisions:
         if rev.Id not in assigned:
@@ -120,7 +212,7 @@ def build_filtered_rev_data(all_revisions, revised_sheets):
             dstr = raw.ToShortDateString()
         except AttributeError:
             dstr = str(raw).strip()
-        if not date_rx.match(dstr):
+        if parse_date_parts(dstr) is None:
             continue
         filtered.append((rev.Id, num, dstr, rev.Description))
 
@@ -129,99 +221,175 @@ def build_filtered_rev_data(all_revisions, revised_sheets):
 
 # -- Chunked fill functions ------------------------------------------------
 
-def fill_revision_header_chunk(ws, rev_chunk):
+def new_value_array(rows, cols):
+    """Allocate a 2D object[rows, cols] for a single Range.Value2 assignment."""
+    return System.Array.CreateInstance(System.Object, rows, cols)
+
+def write_block(ws, top_row, left_col, arr):
+    """Assign a 2D array to the block whose top-left cell is (top_row, left_col)."""
+    rows, cols = arr.GetLength(0), arr.GetLength(1)
+    if not rows or not cols:
+        return
+    top_left = "{0}{1}".format(COL_NAMES[left_col], top_row)
+    bottom_right = "{0}{1}".format(COL_NAMES[left_col + cols - 1], top_row + rows - 1)
+    ws.Range[top_left, bottom_right].Value2 = arr
+
+def build_revision_header_chunk(date_chunk):
     """
-    Fill the revision date header (rows 6–8, columns D onward) for a slice of revisions.
-    rev_chunk: list of (revId, num, date_str, desc) tuples.
+    Build the revision date header (rows 6–8, columns D onward) for a slice of revisions.
+    date_chunk: list of (d, m, y) tuples, or None for unparsable dates.
     """
-    for j, (_id, _num, date_str, _desc) in enumerate(rev_chunk):
-        parts = re.findall(r'\d+', date_str)
-        if len(parts) != 3:
+    arr = new_value_array(3, len(date_chunk))
+    for j, parts in enumerate(date_chunk):
+        if parts is None:
             continue
-        d, m, y = map(int, parts)
-        col = excel_col_name(3 + j)  # 0→A,1→B,2→C so 3→D
-        ws.Range["{0}6".format(col)].Value2 = d
-        ws.Range["{0}7".format(col)].Value2 = m
-        ws.Range["{0}8".format(col)].Value2 = y
+        d, m, y = parts
+        arr[0, j] = d
+        arr[1, j] = m
+        arr[2, j] = y
+    return arr
 
-def fill_sheet_block_chunk(ws, sheet_block, rev_chunk):
+def read_seq_formats(sequences):
+    """
+    Read the numbering settings of every sequence once.
+    Returns {seqId: (prefix, suffix, min_digits, start_number)} for numeric
+    sequences and {seqId: None} for alphanumeric ones.
+    """
+    seq_fmt = {}
+    for seq in sequences:
+        if seq.NumberType == RevisionNumberType.Numeric:
+            s = seq.GetNumericRevisionSettings()
+            seq_fmt[seq.Id] = (s.Prefix or '', s.Suffix or '', s.MinimumDigits, s.StartNumber)
+        else:
+            seq_fmt[seq.Id] = None
+    return seq_fmt
+
+def build_sheet_labels(revised_sheets, rev_data):
     """
-    Fill rows 10–36 for a block of up to 27 sheets, writing drawing numbers,
-    sheet names, and revision labels only for revs in rev_chunk.
-    rev_chunk: list of (revId, num, date_str, desc).
+    Resolve the revision label of every (sheet, revision) pair once.
+    Returns {RevisedSheet: {revId: label}} limited to revisions in rev_data;
+    numeric labels count up per numbering sequence in SequenceNumber order.
     """
-    # map revId→index in this chunk
-    rev_index = {rid: idx for idx, (rid, _, _, _) in enumerate(rev_chunk)}
+    used = set(rid for rid, _, _, _ in rev_data)
+    seq_labels = {}   # (seqId, seq_idx) → numeric label, shared by all sheets
+    rev_labels = {}   # revId → label for non-numeric sequences
+    labels_by_sheet = {}
+    for rs in revised_sheets:
+        rids_sorted = sorted((rid for rid in rs._rev_ids if rid in used),
+                             key=seq_of.get)
+
+        seq_counts = {}
+        labels = {}
+        for rid in rids_sorted:
+            rev = rev_by_id[rid]
+            sid = rev.RevisionNumberingSequenceId
+            seq_idx = seq_counts.get(sid, 0) + 1
+            seq_counts[sid] = seq_idx
+            fmt = seq_fmt.get(sid)
+            if fmt:
+                key = (sid, seq_idx)
+                label = seq_labels.get(key)
+                if label is None:
+                    prefix, suffix, min_digits, start = fmt
+                    label = prefix + str(start + seq_idx - 1).zfill(min_digits) + suffix
+                    seq_labels[key] = label
+            else:
+                label = rev_labels.get(rid)
+                if label is None:
+                    label = rev_labels[rid] = get_rev_number(rev)
+            labels[rid] = label
+        labels_by_sheet[rs] = labels
+    return labels_by_sheet
+
+def build_sheet_block_chunk(sheet_block, rev_start, rev_count, labels_by_pos, sheet_rows):
+    """
+    Build rows 10–36 for a block of up to 27 sheets: drawing numbers and
+    sheet names (columns A–B), and revision labels for rev_data positions
+    rev_start .. rev_start+rev_count-1 (columns D onward).
+    Only plain Python values are read, so it is safe to run off the Revit thread.
+    labels_by_pos: {RevisedSheet: {rev_data position: label}}.
+    sheet_rows: {RevisedSheet: (drawing_number, sheet_name)}.
+    """
+    names = new_value_array(len(sheet_block), 2)
+    labels = new_value_array(len(sheet_block), rev_count)
 
     for i, rs in enumerate(sheet_block):
-        row = 10 + i
-        ws.Range["A{0}".format(row)].Value2 = rs.get_drawing_number()
-        ws.Range["B{0}".format(row)].Value2 = rs.sheet_name
-
-        # gather this sheet's revisions, filter to this chunk
-        revs = [doc.GetElement(rid) for rid in rs._rev_ids if rid in rev_index]
-        revs.sort(key=lambda r: r.SequenceNumber)
-
-        groups = OrderedDict()
-        for rev in revs:
-            groups.setdefault(rev.RevisionNumberingSequenceId, []).append(rev)
-
-        # write each label in the correct column
-        for grp in groups.values():
-            for seq_idx, rev in enumerate(grp, start=1):
-                rid = rev.Id
-                j = rev_index.get(rid)
-                if j is None:
-                    continue
-                seq = doc.GetElement(rev.RevisionNumberingSequenceId)
-                if seq and seq.NumberType == RevisionNumberType.Numeric:
-                    s = seq.GetNumericRevisionSettings()
-                    prefix = s.Prefix or ''
-                    suffix = s.Suffix or ''
-                    num_val = s.StartNumber + seq_idx - 1
-                    label = prefix + str(num_val).zfill(s.MinimumDigits) + suffix
-                else:
-                    label = get_rev_number(rev)
-                col = excel_col_name(3 + j)
-                ws.Range["{0}{1}".format(col, row)].Value2 = label
+        names[i, 0], names[i, 1] = sheet_rows[rs]
+
+        sheet_labels = labels_by_pos[rs]
+        for j in range(rev_count):
+            label = sheet_labels.get(rev_start + j)
+            if label is not None:
+                labels[i, j] = label
+    return names, labels
 
 def fill_all_chunks(wb, all_revisions, revised_sheets,
                     rev_chunk_size=50, sheet_chunk_size=27):
     """
     Orchestrate filling of the workbook by splitting revisions into rev_chunk_size
-    and sheets into sheet_chunk_size, then filling each worksheet accordingly.
+    and sheets into sheet_chunk_size. The value arrays for every worksheet are
+    built in parallel, then written to Excel one worksheet at a time.
     """
     rev_data = build_filtered_rev_data(all_revisions, revised_sheets)
+    labels_by_sheet = build_sheet_labels(revised_sheets, rev_data)
+    # resolve everything that touches Revit here, before the worker threads run;
+    # workers only see ints, strings and tuples (no ElementIds or elements)
+    date_parts = [parse_date_parts(date_str) for _, _, date_str, _ in rev_data]
+    sheet_rows = {rs: (rs.get_drawing_number(), rs.sheet_name) for rs in revised_sheets}
+    rev_pos = {rid: pos for pos, (rid, _, _, _) in enumerate(rev_data)}
+    labels_by_pos = {
+        rs: {rev_pos[rid]: label for rid, label in labels.items()}
+        for rs, labels in labels_by_sheet.items()
+    }
+
     total_rev = len(rev_data)
     total_sheets = len(revised_sheets)
     num_rev_chunks = (total_rev + rev_chunk_size - 1) // rev_chunk_size
     num_sheet_chunks = (total_sheets + sheet_chunk_size - 1) // sheet_chunk_size
-
-    for rc in range(num_rev_chunks):
-        rev_chunk = rev_data[rc*rev_chunk_size : (rc+1)*rev_chunk_size]
-        for sc in range(num_sheet_chunks):
-            sheet_block = revised_sheets[sc*sheet_chunk_size : (sc+1)*sheet_chunk_size]
-            ws_index = rc * num_sheet_chunks + sc + 1
-            ws = wb.Sheets.Item[ws_index]
-            fill_revision_header_chunk(ws, rev_chunk)
-            fill_sheet_block_chunk(ws, sheet_block, rev_chunk)
+    total_ws = num_rev_chunks * num_sheet_chunks
+
+    # the 3×N date header only depends on the rev chunk, so build it once per chunk
+    headers = [
+        build_revision_header_chunk(date_parts[rc*rev_chunk_size : (rc+1)*rev_chunk_size])
+        for rc in range(num_rev_chunks)
+    ]
+
+    ws_arrays = [None] * total_ws
+
+    def build_ws_arrays(ws_index):
+        rc, sc = divmod(ws_index, num_sheet_chunks)
+        header = headers[rc]
+        sheet_block = revised_sheets[sc*sheet_chunk_size : (sc+1)*sheet_chunk_size]
+        names, labels = build_sheet_block_chunk(
+            sheet_block, rc*rev_chunk_size, header.GetLength(1), labels_by_pos, sheet_rows
+        )
+        ws_arrays[ws_index] = (header, names, labels)
+
+    Parallel.For(0, total_ws, Action[int](build_ws_arrays))
+
+    # COM calls stay on this thread; one Value2 assignment per block
+    for ws_index, (header, names, labels) in enumerate(ws_arrays):
+        ws = wb.Sheets.Item[ws_index + 1]
+        write_block(ws, 6, 3, header)   # 0→A,1→B,2→C so 3→D
+        write_block(ws, 10, 0, names)   # column C is left untouched
+        write_block(ws, 10, 3, labels)
 
 # -- Class to represent a sheet with its revisions ------------------------
 
 class RevisedSheet(object):
-    def __init__(self, sheet):
+    def __init__(self, sheet, viewports):
         self._sheet = sheet
+        self._viewport_view_ids = [doc.GetElement(vp).ViewId for vp in viewports]
         self._clouds = []
         self._rev_ids = set()
+        self._drawing_number = None
         self._find_clouds()
         self._find_revisions()
 
     def _find_clouds(self):
-        view_ids = [self._sheet.Id]
-        view_ids += [doc.GetElement(vp).ViewId for vp in self._sheet.GetAllViewports()]
-        for c in all_clouds:
-            if c.OwnerViewId in view_ids:
-                self._clouds.append(c)
+        self._clouds = list(clouds_by_view.get(self._sheet.Id, []))
+        for view_id in self._viewport_view_ids:
+            self._clouds.extend(clouds_by_view.get(view_id, []))
 
     def _find_revisions(self):
         for c in self._clouds:
@@ -238,33 +406,26 @@ class RevisedSheet(object):
         return len(self._rev_ids)
 
     def get_drawing_number(self):
-        parts = []
-        proj_info = doc.ProjectInformation
-        params = [
-            'EWP_Project_BIM Number',
-            'EWP_Project_Originator Code',
-            'EWP_Sheet_Zone Code',
-            'EWP_Sheet_Level Code',
-            'EWP_Sheet_Type Code',
-            'EWP_Project_Role Code',
-            'Sheet Number'
-        ]
-        for pname in params:
-            if 'Project' in pname:
-                p = proj_info.LookupParameter(pname)
-            else:
-                p = self._sheet.LookupParameter(pname)
-            if p and p.AsString():
-                parts.append(p.AsString().strip())
-        return "-".join(parts)
+        if self._drawing_number is None:
+            parts = []
+            for pname in DRAWING_NUMBER_PARAMS:
+                if 'Project' in pname:
+                    value = PROJ_PARTS.get(pname)
+                else:
+                    value = get_param_string(self._sheet, pname)
+                if value:
+                    parts.append(value)
+            self._drawing_number = "-".join(parts)
+        return self._drawing_number
 
 # -- Main execution --------------------------------------------------------
 
 def main():
-    global doc, all_clouds
+    global doc, clouds_by_view, rev_by_id, seq_fmt, seq_of, PROJ_PARTS
 
     uidoc = __revit__.ActiveUIDocument
     doc = uidoc.Document
+    PROJ_PARTS = read_project_parts(doc.ProjectInformation)
 
     # collect sheets, clouds, revisions
     all_sheets = sorted(
@@ -275,18 +436,33 @@ def main():
         key=lambda s: s.SheetNumber
     )
     all_clouds = FilteredElementCollector(doc) \
-        .OfCategory(BuiltInCategory.OST_RevisionClouds) \
-        .WhereElementIsNotElementType() \
+        .OfClass(RevisionCloud) \
         .ToElements()
     all_revisions = FilteredElementCollector(doc) \
-        .OfCategory(BuiltInCategory.OST_Revisions) \
-        .WhereElementIsNotElementType() \
+        .OfClass(Revision) \
         .ToElements()
 
+    # index clouds by owner view so each sheet is a few dict lookups
+    clouds_by_view = {}
+    for c in all_clouds:
+        clouds_by_view.setdefault(c.OwnerViewId, []).append(c)
+
+    # index revisions and numbering sequences once for all chunks
+    rev_by_id = {r.Id: r for r in all_revisions}
+    seq_of = {r.Id: r.SequenceNumber for r in all_revisions}
+    seq_fmt = read_seq_formats(FilteredElementCollector(doc)
+                               .OfClass(RevisionNumberingSequence))
+
     # filter sheets & show total count
     revised_sheets, total_revisions = filter_valid_sheets_and_show_count(
         all_sheets, all_revisions
     )
+    if not revised_sheets:
+        TaskDialog.Show(
+            "Issue Sheet",
+            "No sheets marked 'Appears In Sheet List' with revisions found."
+        )
+        return
 
     # prepare Excel template
     template_path = r"I:\BLU - Service Delivery\04 Building Information Management\07 EWiz\Document Issue Sheet.xlsm"
@@ -305,21 +481,27 @@ def main():
     excel.DisplayAlerts = False
     wb = excel.Workbooks.Open(save_path)
 
-    # fill job info on each sheet
-    proj_info = doc.ProjectInformation
-    nm = proj_info.LookupParameter('Project Name')
-    num = proj_info.LookupParameter('Project Number')
-    for i in range(1, wb.Sheets.Count + 1):
-        ws = wb.Sheets.Item[i]
-        name = nm.AsString().strip() if nm else ""
-        number = num.AsString().strip() if num else ""
-        ws.Range["A6"].Value2 = "Job name: " + name
-        ws.Range["A6"].Font.Bold = True
-        ws.Range["B7"].Value2 = "Job no: " + number
-        ws.Range["B7"].Font.Bold = True
-
-    # fill revisions & sheets in chunks, filtering out unused revisions
-    fill_all_chunks(wb, all_revisions, revised_sheets)
+    # defer recalculation and redraw until all cells are written
+    excel_state = suspend_excel_updates(excel, wb)
+    try:
+        # fill job info on each sheet
+        proj_info = doc.ProjectInformation
+        nm = proj_info.LookupParameter('Project Name')
+        num = proj_info.LookupParameter('Project Number')
+        name = nm.AsString().strip() if nm and nm.AsString() else ""
+        number = num.AsString().strip() if num and num.AsString() else ""
+        a6_text = "Job name: " + name
+        b7_text = "Job no: " + number
+        for i in range(1, wb.Sheets.Count + 1):
+            ws = wb.Sheets.Item[i]
+            ws.Range["A6"].Value2 = a6_text
+            ws.Range["B7"].Value2 = b7_text
+            ws.Range["A6,B7"].Font.Bold = True
+
+        # fill revisions & sheets in chunks, filtering out unused revisions
+        fill_all_chunks(wb, all_revisions, revised_sheets)
+    finally:
+        restore_excel_updates(excel, wb, excel_state)
 
     # save & clean up COM
     wb.Save()
@@ -329,7 +511,6 @@ def main():
     Marshal.ReleaseComObject(excel)
     wb, excel = None, None
 
-    import System
     System.GC.Collect()
     System.GC.WaitForPendingFinalizers()
     System.GC.Collect()